@@ -1,10 +1,20 @@
 # main.py
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
+from cachetools import TTLCache
 import redis.asyncio as redis
+from redis.exceptions import NoScriptError
+import orjson
+import zstandard
 import asyncio
+import functools
+import logging
+from contextlib import asynccontextmanager, suppress
+import os
+import socket
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 # --- Configuration ---
 # Redis connection details
@@ -12,30 +22,442 @@ REDIS_HOST = "localhost"
 REDIS_PORT = 6379
 REDIS_DB = 0
 REDIS_TTL_SECONDS = 30 # Time-to-live for cached items
+# Simulated DB latency in seconds; 0 skips the sleep entirely so the caching logic itself can be benchmarked
+DB_SIM_LATENCY = float(os.getenv("DB_SIM_LATENCY", "0"))
+LOCK_TTL_MS = 30000 # Expiry of the per-item fill lock, in case its holder dies
+LOCK_WAIT_SECONDS = 2 # How long a request waits for another request to fill the cache
+LOCK_POLL_INTERVAL_SECONDS = 0.05
+NOT_FOUND_TTL_MS = 1000 # How long a "not in the database" result is cached, so waiters and retries skip the DB
+# Deferred write-behind DB writes are queued in a Redis Stream and drained by a consumer group
+WRITE_BEHIND_STREAM = "wb_stream"
+WRITE_BEHIND_GROUP = "wb"
+WRITE_BEHIND_CONSUMER = f"{socket.gethostname()}-{os.getpid()}" # One consumer per worker process
+WRITE_BEHIND_DEAD_LETTER_STREAM = "wb_dead_letter" # Entries that can't be parsed or were trimmed are recorded here
+WRITE_BEHIND_STREAM_MAXLEN = 100_000 # Approximate cap on the stream length
+WRITE_BEHIND_BATCH_SIZE = 500 # Max entries read per drain
+WRITE_BEHIND_BLOCK_MS = 200 # How long a drain waits for new entries
+WRITE_BEHIND_CLAIM_IDLE_MS = 30000 # Entries unacknowledged this long are taken over from dead consumers
+WRITE_BEHIND_CLAIM_INTERVAL_SECONDS = 5 # How often to look for entries stuck with a dead or failed consumer
+ALL_ITEMS_KEY = "all_items" # Set of all item ids
+ITEMS_BY_TS_KEY = "items_by_ts" # Sorted set of item ids, scored by last write timestamp
+BULK_PIPELINE_CHUNK_SIZE = 1000 # Max items written per pipeline in bulk writes
+CACHE_COMPRESSION_THRESHOLD_BYTES = 256 # Cached descriptions larger than this are zstd-compressed
+L1_CACHE_MAX_ITEMS = 10_000
+L1_CACHE_TTL_SECONDS = 1.0 # Upper bound on how stale an in-process (L1) entry can be
+L1_CACHE_TRACKED_TTL_SECONDS = REDIS_TTL_SECONDS # L1 entry lifetime while Redis pushes invalidations
+TRACKING_HEALTH_CHECK_INTERVAL_SECONDS = 5 # How often the client tracking connections are pinged
+
+# Per-request messages are logged at DEBUG level with lazy %-formatting, so they cost
+# next to nothing unless DEBUG logging is enabled. The level comes from the LOG_LEVEL
+# environment variable (default INFO); run with LOG_LEVEL=DEBUG to see every cache hit,
+# miss and fill:
+#   LOG_LEVEL=DEBUG uvicorn main:app
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
 # --- Simulated Database ---
 # In a real application, this would be a database like PostgreSQL, MongoDB, etc.
 # We'll use a simple dictionary to simulate data storage.
 # Key: item_id, Value: {name: str, description: str, value: float, timestamp: float}
 simulated_db: Dict[str, Dict[str, Any]] = {}
+# Tombstones of deleted items (Key: item_id, Value: delete timestamp), so a deferred write that
+# is replayed after the delete can't bring the item back
+simulated_db_deleted: Dict[str, float] = {}
 
 # --- Redis Client Initialization ---
-# Use redis.asyncio for asynchronous operations with FastAPI
-redis_client: redis.Redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+# Use redis.asyncio for asynchronous operations with FastAPI.
+# A shared connection pool lets concurrent requests use separate connections
+# instead of queueing behind a single one. redis-py uses the C-based `hiredis` parser,
+# installed with `redis[hiredis]` from requirements.txt.
+# No connection is opened here; the lifespan handler pre-warms the pool and exposes
+# the client to the endpoints as `app.state.redis`.
+# Responses are kept as bytes (no `decode_responses`): values are written as bytes and read
+# back as bytes, so nothing is decoded to str just to be encoded again.
+# The pool blocks when all connections are in use: a request waits up to REDIS_POOL_TIMEOUT_SECONDS
+# for a free connection instead of failing immediately under a burst of traffic.
+REDIS_MAX_CONNECTIONS = 64
+REDIS_POOL_TIMEOUT_SECONDS = 5
+redis_pool: redis.BlockingConnectionPool = redis.BlockingConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT_SECONDS, decode_responses=False
+)
+redis_client: redis.Redis = redis.Redis(connection_pool=redis_pool)
+
+# Deletes the lock only if it is still held by the given token, so a request whose
+# lock already expired can't release a lock that another request has since acquired.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+release_lock = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+
+# Populates an item hash only if it doesn't exist yet and returns the fields that are already
+# cached (or nil if ours were stored), so a late cache fill never overwrites a value written meanwhile.
+# ARGV is the TTL followed by the field/value pairs to store.
+GET_OR_SET_SCRIPT = """
+local v = redis.call('HGETALL', KEYS[1])
+if #v > 0 then
+    return v
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return false
+"""
+get_or_set = redis_client.register_script(GET_OR_SET_SCRIPT)
+# Pipelines that run a registered script check it with SCRIPT EXISTS first, an extra round-trip.
+# The lifespan handler loads the script up front instead, so batches queue EVALSHA directly.
+
+# --- Cache Keys ---
+# Keys are built once per item and memoized as bytes, which redis-py sends without re-encoding.
+@functools.lru_cache(maxsize=8192)
+def item_key(item_id: str) -> bytes:
+    """Returns the Redis key of an item's cached hash."""
+    return b"item:" + item_id.encode()
+
+@functools.lru_cache(maxsize=8192)
+def item_lock_key(item_id: str) -> bytes:
+    """Returns the Redis key of an item's cache fill lock."""
+    return b"lock:item:" + item_id.encode()
+
+@functools.lru_cache(maxsize=8192)
+def item_missing_key(item_id: str) -> bytes:
+    """Returns the Redis key that marks an item as not found in the database."""
+    return b"missing:item:" + item_id.encode()
+
+# --- Cached Item Encoding ---
+# Items are cached as Redis hashes (`item:{item_id}` -> name, description, value, timestamp), so
+# single fields can be read (HGET/HMGET) or updated (HSET) without moving the whole item.
+# The free-form description is compressed with zstd (level 1, which is fast) when it is large,
+# to cut the bytes sent over the socket. It is always stored with a marker byte in front
+# saying whether it is compressed.
+ITEM_HASH_FIELDS = ("name", "description", "value", "timestamp")
+ITEM_HASH_FIELD_KEYS = tuple(field.encode() for field in ITEM_HASH_FIELDS) # As returned by HGETALL
+RAW_MARKER = b"\x00"
+COMPRESSED_MARKER = b"\x01"
+zstd_compressor = zstandard.ZstdCompressor(level=1)
+zstd_decompressor = zstandard.ZstdDecompressor()
+
+def encode_item_hash(item_data: Dict[str, Any]) -> Dict[bytes, bytes]:
+    """Returns the hash fields to store in Redis for an item."""
+    description = item_data["description"].encode()
+    if len(description) > CACHE_COMPRESSION_THRESHOLD_BYTES:
+        description = COMPRESSED_MARKER + zstd_compressor.compress(description)
+    else:
+        description = RAW_MARKER + description
+    return {
+        b"name": item_data["name"].encode(),
+        b"description": description,
+        b"value": str(item_data["value"]).encode(),
+        b"timestamp": str(item_data["timestamp"]).encode(),
+    }
+
+def decode_item_field(field: str, value: bytes) -> Any:
+    """Returns the Python value of a single hash field read from Redis."""
+    if field == "description":
+        if value[:1] == COMPRESSED_MARKER:
+            return zstd_decompressor.decompress(value[1:]).decode()
+        return value[1:].decode()
+    if field in ("value", "timestamp"):
+        return float(value)
+    return value.decode()
+
+def decode_item_hash(item_id: str, fields: Dict[bytes, bytes]) -> bytes:
+    """Returns the item's JSON for the hash fields read from Redis."""
+    item_data = {
+        field: decode_item_field(field, fields[key]) for field, key in zip(ITEM_HASH_FIELDS, ITEM_HASH_FIELD_KEYS)
+    }
+    item_data["item_id"] = item_id
+    return orjson.dumps(item_data)
+
+def cache_item(pipe: redis.client.Pipeline, item_id: str, item_data: Dict[str, Any]):
+    """
+    Queues the commands that (over)write an item's hash and its TTL, clear its not-found marker
+    and add the item to the item indexes, on a pipeline. They are all sent to Redis in a single write when it executes.
+    """
+    key = item_key(item_id)
+    pipe.hset(key, mapping=encode_item_hash(item_data))
+    pipe.expire(key, REDIS_TTL_SECONDS)
+    pipe.delete(item_missing_key(item_id))
+    pipe.sadd(ALL_ITEMS_KEY, item_id)
+    pipe.zadd(ITEMS_BY_TS_KEY, {item_id: item_data["timestamp"]})
+
+def uncache_item(pipe: redis.client.Pipeline, item_id: str):
+    """Queues the commands that remove an item's hash and its entries in the item indexes on a pipeline."""
+    pipe.delete(item_key(item_id))
+    pipe.srem(ALL_ITEMS_KEY, item_id)
+    pipe.zrem(ITEMS_BY_TS_KEY, item_id)
+
+def get_or_set_args(item_data: Dict[str, Any]) -> List[Any]:
+    """Returns the ARGV for the get-or-set script: the TTL followed by the field/value pairs."""
+    args: List[Any] = [REDIS_TTL_SECONDS]
+    for field, value in encode_item_hash(item_data).items():
+        args += [field, value]
+    return args
+
+# --- In-Process (L1) Cache ---
+# Small in-memory cache in front of Redis for the read endpoints: a hit skips the Redis round-trip.
+# Each worker process has its own L1 cache. When server-assisted invalidation (see below) is running,
+# Redis tells every worker about changed items and entries can live for L1_CACHE_TRACKED_TTL_SECONDS.
+# Otherwise only this worker's writes/invalidations clear it, so other workers may serve an entry
+# up to L1_CACHE_TTL_SECONDS old.
+l1_cache: TTLCache = TTLCache(maxsize=L1_CACHE_MAX_ITEMS, ttl=L1_CACHE_TTL_SECONDS)
+# Reads of items that are not in the L1 cache, per item: [generation, number of reads in flight].
+# An invalidation bumps the item's generation, and a read only stores its result in the L1 cache
+# if the generation didn't change meanwhile, so a read racing a write can't store the old value.
+# Invalidating one item doesn't affect reads of other items.
+l1_fills: Dict[str, List[int]] = {}
+
+def begin_l1_fill(item_id: str) -> int:
+    """Registers a read of an item that missed the L1 cache and returns its current generation."""
+    fill = l1_fills.get(item_id)
+    if fill is None:
+        fill = l1_fills[item_id] = [0, 0]
+    fill[1] += 1
+    return fill[0]
+
+def end_l1_fill(item_id: str, generation: int, cached_item: bytes | None):
+    """
+    Finishes a read started with begin_l1_fill, storing its result in the L1 cache unless the
+    item was invalidated since `generation`.
+    """
+    fill = l1_fills[item_id]
+    if cached_item is not None and fill[0] == generation:
+        l1_cache[item_id] = cached_item
+    fill[1] -= 1
+    if not fill[1]:
+        del l1_fills[item_id]
+
+def invalidate_l1(item_id: str):
+    """Evicts an item from the L1 cache and keeps reads already in flight from storing it again."""
+    l1_cache.pop(item_id, None)
+    fill = l1_fills.get(item_id)
+    if fill is not None:
+        fill[0] += 1
+
+def invalidate_all_l1():
+    """Clears the L1 cache and keeps reads already in flight from storing anything in it."""
+    l1_cache.clear()
+    for fill in l1_fills.values():
+        fill[0] += 1
+
+# --- Server-Assisted Invalidation (Client Tracking) ---
+# Redis client tracking in broadcast mode: Redis publishes the name of every changed or expired
+# `item:` key on the __redis__:invalidate channel, and the listener evicts it from the L1 cache.
+# This needs two dedicated connections outside the pool: one subscribed to the channel, and one
+# with tracking enabled that redirects its invalidations to the first. Tracking is bound to the
+# lifetime of these connections, so if they drop, the L1 cache is cleared and falls back to the
+# short TTL instead of reconnecting. Both connections are pinged every
+# TRACKING_HEALTH_CHECK_INTERVAL_SECONDS, so a half-open socket that never reports an error is
+# detected too.
+TRACKING_INVALIDATE_CHANNEL = "__redis__:invalidate"
+TRACKING_KEY_PREFIX = b"item:"
+
+async def enable_invalidation_tracking() -> List[redis.Connection]:
+    """Opens the tracking connections and switches the L1 cache to the longer TTL."""
+    global l1_cache
+    listener = redis.Connection(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    tracker = redis.Connection(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    try:
+        await listener.connect()
+        await tracker.connect()
+
+        await listener.send_command("CLIENT", "ID")
+        listener_id = await listener.read_response()
+        await listener.send_command("SUBSCRIBE", TRACKING_INVALIDATE_CHANNEL)
+        await listener.read_response()
+        await tracker.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", listener_id, "BCAST", "PREFIX", TRACKING_KEY_PREFIX
+        )
+        await tracker.read_response()
+    except BaseException:
+        await listener.disconnect()
+        await tracker.disconnect()
+        raise
+
+    l1_cache = TTLCache(maxsize=L1_CACHE_MAX_ITEMS, ttl=L1_CACHE_TRACKED_TTL_SECONDS)
+    return [listener, tracker]
+
+async def invalidation_listener(listener: redis.Connection, tracker: redis.Connection):
+    """
+    Evicts L1 cache entries as Redis reports changed items, until either tracking connection
+    is closed or stops answering pings.
+    """
+    global l1_cache
+    next_health_check = time.monotonic() + TRACKING_HEALTH_CHECK_INTERVAL_SECONDS
+    awaiting_pong = False
+    try:
+        while True:
+            remaining = next_health_check - time.monotonic()
+            if remaining > 0:
+                message = await listener.read_response(timeout=remaining)
+                if message is None:
+                    continue
+                if message[0] == b"pong":
+                    awaiting_pong = False
+                    continue
+                if message[0] != b"message":
+                    continue
+                keys = message[2]
+                if keys is None:
+                    # Sent on FLUSHDB/FLUSHALL
+                    invalidate_all_l1()
+                    continue
+                for key in keys:
+                    invalidate_l1(key[len(TRACKING_KEY_PREFIX):].decode())
+                continue
+
+            # Health check: the listener must have answered the previous PING by now, and the
+            # tracker must answer this one within the interval
+            if awaiting_pong:
+                raise redis.ConnectionError("Redis invalidation listener stopped responding")
+            await listener.send_command("PING")
+            awaiting_pong = True
+            await tracker.send_command("PING")
+            if await tracker.read_response(timeout=TRACKING_HEALTH_CHECK_INTERVAL_SECONDS) is None:
+                raise redis.ConnectionError("Redis tracking connection stopped responding")
+            next_health_check = time.monotonic() + TRACKING_HEALTH_CHECK_INTERVAL_SECONDS
+    except (redis.RedisError, OSError) as e:
+        logger.error("Lost the Redis invalidation connection: %s", e)
+    finally:
+        # Without invalidations the L1 cache can't be kept coherent with longer TTLs
+        invalidate_all_l1()
+        l1_cache = TTLCache(maxsize=L1_CACHE_MAX_ITEMS, ttl=L1_CACHE_TTL_SECONDS)
 
 # --- FastAPI Application Setup ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Connects to Redis before serving the first request and cleans up on shutdown.
+    The startup PING opens the first pooled connection, so the TCP handshake and parser
+    setup don't land on the first request.
+    """
+    asyncio.get_running_loop().set_debug(False)
+    app.state.redis = redis_client
+    try:
+        await app.state.redis.ping()
+        logger.info("Connected to Redis successfully!")
+        await app.state.redis.script_load(GET_OR_SET_SCRIPT)
+        await create_write_behind_group(app.state.redis)
+    except redis.ConnectionError as e:
+        logger.error("Could not connect to Redis: %s. Please ensure Redis is running.", e)
+        # In a real app, you might want to exit or handle this more gracefully.
+    # A fresh stop event per lifespan, so the app can be started again (e.g. in tests)
+    write_behind_stop = asyncio.Event()
+    write_behind_task = asyncio.create_task(write_behind_drain_loop(app.state.redis, write_behind_stop))
+
+    tracking_connections: List[redis.Connection] = []
+    invalidation_task: asyncio.Task | None = None
+    try:
+        tracking_connections = await enable_invalidation_tracking()
+        invalidation_task = asyncio.create_task(invalidation_listener(*tracking_connections))
+        logger.info("Redis client tracking enabled for the L1 cache.")
+    except (redis.RedisError, OSError) as e:
+        logger.error("Could not enable Redis client tracking: %s. Using a short L1 cache TTL.", e)
+
+    yield
+
+    # Stop invalidation tracking, flush deferred writes, then close Redis connections
+    if invalidation_task:
+        # Wait for the listener's cleanup to finish before its connections go away
+        invalidation_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await invalidation_task
+    for connection in tracking_connections:
+        await connection.disconnect()
+    write_behind_stop.set()
+    try:
+        await write_behind_task
+        logger.info("Write-behind queue drained.")
+    finally:
+        await redis_pool.disconnect()
+        logger.info("Redis connection pool closed.")
+
+# Install the dependencies with `pip install -r requirements.txt`, then run with uvloop and
+# httptools for a faster event loop and HTTP parser:
+#   uvicorn main:app --loop uvloop --http httptools
 app = FastAPI(
     title="FastAPI Caching Patterns Demo",
     description="Demonstrates various server-side caching strategies.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+def get_redis(request: Request) -> redis.Redis:
+    """Dependency returning the Redis client set up by the lifespan handler."""
+    return request.app.state.redis
+
+async def get_cached_item(redis_conn: redis.Redis, item_id: str) -> tuple[bytes | None, bool]:
+    """
+    Returns an item's JSON from the L1 cache or Redis (None if it isn't cached), and whether the
+    item is marked as not found in the database.
+    """
+    cached_item = l1_cache.get(item_id)
+    if cached_item is not None:
+        return cached_item, False
+    generation = begin_l1_fill(item_id)
+    cached_item = None
+    try:
+        async with redis_conn.pipeline(transaction=False) as pipe:
+            pipe.hgetall(item_key(item_id))
+            pipe.exists(item_missing_key(item_id))
+            cached_fields, missing = await pipe.execute()
+        if cached_fields:
+            cached_item = decode_item_hash(item_id, cached_fields)
+        return cached_item, bool(missing)
+    finally:
+        end_l1_fill(item_id, generation, cached_item)
+
+# Same body as HTTPException(status_code=404, detail="Item not found") produces
+ITEM_NOT_FOUND_BODY = b'{"detail":"Item not found"}'
+
+class CacheHitFastPathMiddleware:
+    """
+    Plain ASGI middleware that serves cache hits for `GET /cache-aside/{item_id}` and
+    `GET /read-through/{item_id}` straight from the cache, skipping FastAPI's routing,
+    dependency resolution and validation. Items marked as not found get their 404 here too.
+    Misses fall through to the regular endpoints, which handle the cache fill; the middleware
+    sets `cache_checked` on the request state so they don't look the item up in Redis again.
+    Other requests pass through untouched.
+    """
+    FAST_PATH_PREFIXES = ("/cache-aside/", "/read-through/")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            path: str = scope["path"]
+            for prefix in self.FAST_PATH_PREFIXES:
+                if path.startswith(prefix):
+                    item_id = path[len(prefix):]
+                    if item_id and "/" not in item_id:
+                        cached_item, missing = await get_cached_item(scope["app"].state.redis, item_id)
+                        if cached_item is not None:
+                            logger.debug("--- CACHE HIT (fast path): Item %s found in cache ---", item_id)
+                            await Response(content=cached_item, media_type="application/json")(scope, receive, send)
+                            return
+                        if missing:
+                            await Response(
+                                content=ITEM_NOT_FOUND_BODY, status_code=404, media_type="application/json"
+                            )(scope, receive, send)
+                            return
+                        scope.setdefault("state", {})["cache_checked"] = True
+                    break
+        await self.app(scope, receive, send)
+
+app.add_middleware(CacheHitFastPathMiddleware)
+
 # --- Pydantic Models ---
 class Item(BaseModel):
     name: str
     description: str
     value: float
 
+class ItemWithId(Item):
+    item_id: str
+
 class ItemInDB(Item):
     item_id: str
     timestamp: float
@@ -44,31 +466,204 @@ class ItemInDB(Item):
 
 async def get_item_from_db(item_id: str) -> Dict[str, Any] | None:
     """Simulates fetching an item from the database."""
-    print(f"--- DB READ: Fetching item_id: {item_id} from simulated_db ---")
-    await asyncio.sleep(0.5) # Simulate network/DB latency
+    logger.debug("--- DB READ: Fetching item_id: %s from simulated_db ---", item_id)
+    if DB_SIM_LATENCY:
+        await asyncio.sleep(DB_SIM_LATENCY) # Simulate network/DB latency
     return simulated_db.get(item_id)
 
 async def write_item_to_db(item_id: str, item_data: Dict[str, Any]):
     """Simulates writing an item to the database."""
-    print(f"--- DB WRITE: Writing item_id: {item_id} to simulated_db ---")
-    await asyncio.sleep(1) # Simulate network/DB write latency
+    logger.debug("--- DB WRITE: Writing item_id: %s to simulated_db ---", item_id)
+    if DB_SIM_LATENCY:
+        await asyncio.sleep(DB_SIM_LATENCY) # Simulate network/DB latency
     simulated_db[item_id] = item_data
-    print(f"--- DB WRITE: Item {item_id} written to DB ---")
+    logger.debug("--- DB WRITE: Item %s written to DB ---", item_id)
+
+async def write_item_to_db_if_newer(item_id: str, item_data: Dict[str, Any]) -> bool:
+    """
+    Simulates a conditional write (`UPDATE ... WHERE timestamp < :timestamp`): the item is only
+    written if the DB doesn't already hold a newer version of it and it wasn't deleted after the
+    write was made. Returns whether it was written.
+    """
+    logger.debug("--- DB WRITE: Writing item_id: %s to simulated_db if newer ---", item_id)
+    if DB_SIM_LATENCY:
+        await asyncio.sleep(DB_SIM_LATENCY) # Simulate network/DB latency
+    stored_item = simulated_db.get(item_id)
+    if stored_item is not None and stored_item["timestamp"] >= item_data["timestamp"]:
+        logger.debug("--- DB WRITE SKIPPED: DB already holds a newer version of item %s ---", item_id)
+        return False
+    deleted_at = simulated_db_deleted.get(item_id)
+    if deleted_at is not None and deleted_at >= item_data["timestamp"]:
+        logger.debug("--- DB WRITE SKIPPED: Item %s was deleted after this write ---", item_id)
+        return False
+    simulated_db[item_id] = item_data
+    logger.debug("--- DB WRITE: Item %s written to DB ---", item_id)
+    return True
 
 async def delete_item_from_db(item_id: str):
     """Simulates deleting an item from the database."""
-    print(f"--- DB DELETE: Deleting item_id: {item_id} from simulated_db ---")
-    await asyncio.sleep(0.5) # Simulate network/DB latency
-    if item_id in simulated_db:
-        del simulated_db[item_id]
-        print(f"--- DB DELETE: Item {item_id} deleted from DB ---")
+    logger.debug("--- DB DELETE: Deleting item_id: %s from simulated_db ---", item_id)
+    if DB_SIM_LATENCY:
+        await asyncio.sleep(DB_SIM_LATENCY) # Simulate network/DB latency
+    simulated_db_deleted[item_id] = time.time()
+    if simulated_db.pop(item_id, None) is not None:
+        logger.debug("--- DB DELETE: Item %s deleted from DB ---", item_id)
     else:
-        print(f"--- DB DELETE: Item {item_id} not found in DB ---")
+        logger.debug("--- DB DELETE: Item %s not found in DB ---", item_id)
+
+# --- Write-Behind Queue ---
+# Deferred DB writes are appended to a Redis Stream instead of being kept in process memory,
+# so they survive a worker crash or restart. Each worker drains the stream as a member of one
+# consumer group; entries are only acknowledged (XACK) once written to the DB, and entries left
+# unacknowledged by a dead worker are claimed by another one.
+# Each drained batch is coalesced per item_id: only the newest write for an item survives,
+# so a burst of updates to the same item costs a single DB write.
+# Entries can be replayed out of order (a claimed entry from a dead worker, or two workers draining
+# at once), so the DB write is conditional on the entry's timestamp and never overwrites a newer row.
+
+async def create_write_behind_group(redis_conn: redis.Redis):
+    """Creates the write-behind stream and consumer group if they don't exist yet."""
+    try:
+        await redis_conn.xgroup_create(WRITE_BEHIND_STREAM, WRITE_BEHIND_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+async def flush_write_behind(redis_conn: redis.Redis, entries: List[Any]):
+    """
+    Writes a batch of stream entries to the database concurrently and acknowledges them.
+    Entries that can't be parsed, or were trimmed from the stream before being written, are
+    recorded in the dead-letter stream and acknowledged, so they don't block the queue. Entries whose DB write fails stay unacknowledged and are retried
+    once they are claimed again.
+    """
+    if not entries:
+        return
+    batch: Dict[str, Dict[str, Any]] = {}
+    batch_entry_ids: Dict[str, List[bytes]] = {} # Stream entries coalesced into each item's write
+    done_entry_ids: List[bytes] = []
+    dead_letters: List[Dict[bytes, bytes]] = []
+    for entry_id, fields in entries:
+        if not fields:
+            # Entry was trimmed from the stream (MAXLEN) while pending: its write is lost.
+            # Record its id in the dead-letter stream so the loss can be traced.
+            logger.error("Write-behind entry %s was trimmed from the stream before it was written to the DB", entry_id)
+            dead_letters.append({b"entry_id": entry_id, b"error": b"trimmed from the stream before it was written"})
+            done_entry_ids.append(entry_id)
+            continue
+        try:
+            item_id = fields[b"id"].decode()
+            item_data = orjson.loads(fields[b"data"])
+            timestamp = float(item_data["timestamp"])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error("Moving malformed write-behind entry %s to %s: %r", entry_id, WRITE_BEHIND_DEAD_LETTER_STREAM, e)
+            dead_letters.append({**fields, b"entry_id": entry_id, b"error": repr(e).encode()})
+            done_entry_ids.append(entry_id)
+            continue
+        batch_entry_ids.setdefault(item_id, []).append(entry_id)
+        newest = batch.get(item_id)
+        if newest is None or timestamp >= newest["timestamp"]:
+            batch[item_id] = item_data
+
+    if batch:
+        logger.debug("--- DB WRITE FLUSH: Writing %s deferred item(s) to simulated_db ---", len(batch))
+        results = await asyncio.gather(
+            *(write_item_to_db_if_newer(item_id, item_data) for item_id, item_data in batch.items()),
+            return_exceptions=True
+        )
+        for item_id, result in zip(batch, results):
+            if isinstance(result, Exception):
+                logger.error("Deferred DB write of item %s failed, will retry: %r", item_id, result)
+            else:
+                done_entry_ids += batch_entry_ids[item_id]
+
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        for fields in dead_letters:
+            pipe.xadd(WRITE_BEHIND_DEAD_LETTER_STREAM, fields)
+        if done_entry_ids:
+            pipe.xack(WRITE_BEHIND_STREAM, WRITE_BEHIND_GROUP, *done_entry_ids)
+        await pipe.execute()
+
+async def claim_stale_write_behind(redis_conn: redis.Redis):
+    """
+    Takes over and flushes entries that have been pending longer than WRITE_BEHIND_CLAIM_IDLE_MS,
+    i.e. read by a worker that crashed or whose DB write failed, following the XAUTOCLAIM cursor
+    through the whole pending list.
+    """
+    start_id = b"0-0"
+    while True:
+        next_id, entries = (await redis_conn.xautoclaim(
+            WRITE_BEHIND_STREAM, WRITE_BEHIND_GROUP, WRITE_BEHIND_CONSUMER,
+            min_idle_time=WRITE_BEHIND_CLAIM_IDLE_MS, start_id=start_id, count=WRITE_BEHIND_BATCH_SIZE
+        ))[:2]
+        await flush_write_behind(redis_conn, entries)
+        if next_id in (b"0-0", "0-0"):
+            break
+        start_id = next_id
+
+async def write_behind_drain_loop(redis_conn: redis.Redis, stop: asyncio.Event):
+    """Drains the write-behind stream until `stop` is set, then flushes what is left."""
+    next_claim = 0.0
+    while not stop.is_set():
+        try:
+            # Periodically retry entries left pending by crashed workers or failed DB writes
+            if time.monotonic() >= next_claim:
+                next_claim = time.monotonic() + WRITE_BEHIND_CLAIM_INTERVAL_SECONDS
+                await claim_stale_write_behind(redis_conn)
+            streams = await redis_conn.xreadgroup(
+                WRITE_BEHIND_GROUP, WRITE_BEHIND_CONSUMER, {WRITE_BEHIND_STREAM: ">"},
+                count=WRITE_BEHIND_BATCH_SIZE, block=WRITE_BEHIND_BLOCK_MS
+            )
+            for _, entries in streams:
+                await flush_write_behind(redis_conn, entries)
+        except redis.ResponseError as e:
+            # The group is missing if Redis was unreachable at startup or has been flushed
+            if "NOGROUP" in str(e):
+                await create_write_behind_group(redis_conn)
+            else:
+                logger.error("Write-behind drain failed: %s", e)
+                await asyncio.sleep(WRITE_BEHIND_BLOCK_MS / 1000)
+        except Exception as e:
+            logger.error("Write-behind drain failed: %r", e)
+            await asyncio.sleep(WRITE_BEHIND_BLOCK_MS / 1000)
+
+    # Shutdown: flush everything that is already queued without blocking for new entries.
+    # Anything left unflushed stays in the stream and is claimed by another worker.
+    try:
+        while True:
+            streams = await redis_conn.xreadgroup(
+                WRITE_BEHIND_GROUP, WRITE_BEHIND_CONSUMER, {WRITE_BEHIND_STREAM: ">"},
+                count=WRITE_BEHIND_BATCH_SIZE
+            )
+            if not streams or not streams[0][1]:
+                break
+            for _, entries in streams:
+                await flush_write_behind(redis_conn, entries)
+    except Exception as e:
+        logger.error("Could not drain the write-behind stream on shutdown: %r", e)
 
 # --- Caching Pattern Implementations ---
 
+async def rollback_cache_writes(redis_conn: redis.Redis, item_ids: List[str]):
+    """
+    Undoes the cache writes of items whose write-through failed: drops their cached hashes and sets
+    their index entries to what the database actually holds (the old row after a failed update, the
+    new row if only the cache write failed, or no entry if the item isn't in the database).
+    """
+    db_items = await asyncio.gather(*(get_item_from_db(item_id) for item_id in item_ids))
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        for item_id, db_item in zip(item_ids, db_items):
+            if db_item:
+                pipe.delete(item_key(item_id))
+                pipe.sadd(ALL_ITEMS_KEY, item_id)
+                pipe.zadd(ITEMS_BY_TS_KEY, {item_id: db_item["timestamp"]})
+            else:
+                uncache_item(pipe, item_id)
+        await pipe.execute()
+    for item_id in item_ids:
+        invalidate_l1(item_id)
+
 @app.post("/write-through/{item_id}", response_model=ItemInDB, summary="Write-Through Caching")
-async def create_item_write_through(item_id: str, item: Item):
+async def create_item_write_through(item_id: str, item: Item, redis_conn: redis.Redis = Depends(get_redis)):
     """
     **Write-Through Caching:**
     Data is written to both the cache and the underlying persistent data store simultaneously.
@@ -80,40 +675,215 @@ async def create_item_write_through(item_id: str, item: Item):
     item_data["item_id"] = item_id
     item_data["timestamp"] = time.time()
 
-    # 1. Write to Database
-    await write_item_to_db(item_id, item_data)
+    # Write to Database and Cache simultaneously, so the write costs max(db, cache) instead of the sum.
+    # The cache write (item hash, TTL and index updates) is a single non-transactional pipeline,
+    # i.e. one round-trip to Redis.
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        cache_item(pipe, item_id, item_data)
+        db_result, cache_result = await asyncio.gather(
+            write_item_to_db(item_id, item_data), pipe.execute(), return_exceptions=True
+        )
+    invalidate_l1(item_id)
+
+    # The write is only acknowledged if both succeeded. Otherwise drop the cache entry and restore
+    # the index entries from the DB, so the cache never serves or lists a value the DB didn't store
+    # (or an outdated one after a failed cache write).
+    if isinstance(db_result, BaseException) or isinstance(cache_result, BaseException):
+        logger.error("Write-through of item %s failed (db: %r, cache: %r)", item_id, db_result, cache_result)
+        try:
+            await rollback_cache_writes(redis_conn, [item_id])
+        except redis.RedisError as e:
+            logger.error("Could not remove item %s from cache after a failed write-through: %s", item_id, e)
+        raise HTTPException(status_code=500, detail="Write-through failed")
+    logger.debug("--- CACHE WRITE: Item %s written to cache (Write-Through) ---", item_id)
+
+    return Response(content=orjson.dumps(item_data), media_type="application/json")
+
+@app.post("/bulk-write-through", response_model=List[ItemInDB], summary="Bulk Write-Through Caching")
+async def create_items_bulk_write_through(items: List[ItemWithId], redis_conn: redis.Redis = Depends(get_redis)):
+    """
+    **Bulk Write-Through Caching:**
+    Write-Through for many items at once. The database writes run concurrently, and the cache writes
+    are sent one after another in pipelines of up to BULK_PIPELINE_CHUNK_SIZE items, overlapped with
+    the database writes, so N items cost a handful of round-trips to Redis instead of N. The write is acknowledged once both have completed.
+    If any write fails, the cache writes of the affected items are rolled back and the request fails.
+    """
+    timestamp = time.time()
+    items_data: List[Dict[str, Any]] = []
+    for item in items:
+        item_data = item.model_dump()
+        item_data["timestamp"] = timestamp
+        items_data.append(item_data)
+
+    async def write_to_cache():
+        # One chunk at a time on a single connection, so a large batch doesn't take over the pool
+        async with redis_conn.pipeline(transaction=False) as pipe:
+            for i in range(0, len(items_data), BULK_PIPELINE_CHUNK_SIZE):
+                for item_data in items_data[i:i + BULK_PIPELINE_CHUNK_SIZE]:
+                    cache_item(pipe, item_data["item_id"], item_data)
+                await pipe.execute()
 
-    # 2. Write to Cache (simultaneously or immediately after DB write)
-    # Store as a JSON string in Redis
-    await redis_client.setex(f"item:{item_id}", REDIS_TTL_SECONDS, ItemInDB(**item_data).model_dump_json())
-    print(f"--- CACHE WRITE: Item {item_id} written to cache (Write-Through) ---")
+    *db_results, cache_result = await asyncio.gather(
+        *(write_item_to_db(item_data["item_id"], item_data) for item_data in items_data),
+        write_to_cache(),
+        return_exceptions=True
+    )
+    for item_data in items_data:
+        invalidate_l1(item_data["item_id"])
+
+    # As in Write-Through, roll back the cache writes of items whose DB write failed, or of every item
+    # if the cache write failed (it may have stopped after any chunk)
+    if isinstance(cache_result, BaseException):
+        failed_ids = [item_data["item_id"] for item_data in items_data]
+    else:
+        failed_ids = [
+            item_data["item_id"] for item_data, db_result in zip(items_data, db_results)
+            if isinstance(db_result, BaseException)
+        ]
+    if failed_ids:
+        logger.error(
+            "Bulk write-through of %s item(s) failed (first db error: %r, cache: %r)", len(failed_ids),
+            next((r for r in db_results if isinstance(r, BaseException)), None), cache_result
+        )
+        try:
+            await rollback_cache_writes(redis_conn, failed_ids)
+        except redis.RedisError as e:
+            logger.error("Could not remove items from cache after a failed bulk write-through: %s", e)
+        raise HTTPException(status_code=500, detail=f"Write-through failed for {len(failed_ids)} item(s)")
+    logger.debug("--- CACHE WRITE: %s item(s) written to cache (Bulk Write-Through) ---", len(items_data))
 
-    return ItemInDB(**item_data)
+    return Response(content=orjson.dumps(items_data), media_type="application/json")
 
 @app.post("/write-behind/{item_id}", response_model=ItemInDB, summary="Write-Behind Caching")
-async def create_item_write_behind(item_id: str, item: Item, background_tasks: BackgroundTasks):
+async def create_item_write_behind(item_id: str, item: Item, redis_conn: redis.Redis = Depends(get_redis)):
     """
     **Write-Behind Caching:**
     Data is written to the cache first, and the write to the underlying data store is deferred and performed asynchronously.
     Reduces write latency for the client.
     Introduces a risk of data loss if the cache fails before the data is persisted to the database.
+    Deferred writes are queued in a Redis Stream, so they survive a restart of this application.
     Usecases: Social media likes/comments, logging, analytics where immediate persistence isn't critical.
     """
     item_data = item.model_dump()
     item_data["item_id"] = item_id
     item_data["timestamp"] = time.time()
 
-    # 1. Write to Cache immediately
-    await redis_client.setex(f"item:{item_id}", REDIS_TTL_SECONDS, ItemInDB(**item_data).model_dump_json())
-    print(f"--- CACHE WRITE: Item {item_id} written to cache (Write-Behind) ---")
+    # 1. Write to Cache immediately and 2. queue the write to Database, in one round-trip.
+    # MULTI/EXEC applies both or neither, so the cache never holds a value whose DB write wasn't
+    # queued. The drain loop persists queued writes asynchronously.
+    payload = orjson.dumps(item_data)
+    async with redis_conn.pipeline(transaction=True) as pipe:
+        cache_item(pipe, item_id, item_data)
+        pipe.xadd(
+            WRITE_BEHIND_STREAM, {"id": item_id, "data": payload},
+            maxlen=WRITE_BEHIND_STREAM_MAXLEN, approximate=True
+        )
+        await pipe.execute()
+    invalidate_l1(item_id)
+    logger.debug("--- CACHE WRITE: Item %s written to cache (Write-Behind) ---", item_id)
+    logger.debug("--- DB WRITE DEFERRED: Item %s will be written to DB asynchronously ---", item_id)
 
-    # 2. Add background task to write to Database asynchronously
-    background_tasks.add_task(write_item_to_db, item_id, item_data)
-    print(f"--- DB WRITE DEFERRED: Item {item_id} will be written to DB asynchronously ---")
+    return Response(content=payload, media_type="application/json")
+
+async def _fill_from_db(redis_conn: redis.Redis, item_id: str, pattern: str) -> bytes:
+    """Fetches an item from the database, populates the cache with it and returns the cached JSON."""
+    db_item = await get_item_from_db(item_id)
+    if not db_item:
+        # Let requests waiting on this fill (and quick retries) answer 404 without asking the DB again
+        await redis_conn.set(item_missing_key(item_id), b"1", px=NOT_FOUND_TTL_MS)
+        raise HTTPException(status_code=404, detail="Item not found")
 
-    return ItemInDB(**item_data)
+    cached_fields = await get_or_set(keys=[item_key(item_id)], args=get_or_set_args(db_item), client=redis_conn)
+    if cached_fields:
+        logger.debug("--- CACHE ALREADY POPULATED: Item %s was added to cache meanwhile (%s) ---", item_id, pattern)
+        return decode_item_hash(item_id, dict(zip(cached_fields[::2], cached_fields[1::2])))
+    logger.debug("--- CACHE POPULATED: Item %s added to cache (%s) ---", item_id, pattern)
 
-async def read_through_get_item(item_id: str) -> ItemInDB:
+    return orjson.dumps(db_item)
+
+async def _get_or_fill(redis_conn: redis.Redis, item_id: str, pattern: str, skip_cache_check: bool = False) -> bytes:
+    """
+    Returns an item's JSON from the in-process L1 cache, falling back to Redis and the database.
+    `skip_cache_check` skips the Redis lookup when the caller just found the item missing there.
+    """
+    cached_item = l1_cache.get(item_id)
+    if cached_item is not None:
+        logger.debug("--- L1 CACHE HIT: Item %s found in local cache (%s) ---", item_id, pattern)
+        return cached_item
+
+    generation = begin_l1_fill(item_id)
+    cached_item = None
+    try:
+        cached_item = await _get_or_fill_redis(redis_conn, item_id, pattern, skip_cache_check)
+        return cached_item
+    finally:
+        end_l1_fill(item_id, generation, cached_item)
+
+async def _fill_with_lock(redis_conn: redis.Redis, item_id: str, pattern: str) -> bytes | None:
+    """
+    Fills the cache from the database if this request acquires the item's fill lock.
+    Returns None if another request holds the lock.
+    """
+    lock_key = item_lock_key(item_id)
+    token = os.urandom(16)
+    if not await redis_conn.set(lock_key, token, nx=True, px=LOCK_TTL_MS):
+        return None
+    try:
+        return await _fill_from_db(redis_conn, item_id, pattern)
+    finally:
+        await release_lock(keys=[lock_key], args=[token], client=redis_conn)
+
+async def _get_or_fill_redis(redis_conn: redis.Redis, item_id: str, pattern: str, skip_cache_check: bool = False) -> bytes:
+    """
+    Returns an item's JSON from Redis, filling Redis from the database on a miss.
+    Only one request per item fetches from the database at a time (single-flight): the request
+    that acquires the `lock:item:{item_id}` lock fills the cache, while concurrent requests poll
+    the cache until it is populated. This prevents a cache stampede on cold or invalidated keys.
+    Items missing from the database are remembered for NOT_FOUND_TTL_MS, so waiters answer 404
+    as soon as the fill finds nothing.
+    """
+    # 1. Check cache, unless the fast-path middleware just did
+    if not skip_cache_check:
+        async with redis_conn.pipeline(transaction=False) as pipe:
+            pipe.hgetall(item_key(item_id))
+            pipe.exists(item_missing_key(item_id))
+            cached_fields, missing = await pipe.execute()
+        if cached_fields:
+            logger.debug("--- CACHE HIT: Item %s found in cache (%s) ---", item_id, pattern)
+            return decode_item_hash(item_id, cached_fields)
+        if missing:
+            raise HTTPException(status_code=404, detail="Item not found")
+
+    logger.debug("--- CACHE MISS: Item %s not in cache (%s) ---", item_id, pattern)
+    # 2. Cache miss: Try to become the request that fills the cache
+    cached_item = await _fill_with_lock(redis_conn, item_id, pattern)
+    if cached_item is not None:
+        return cached_item
+
+    # 3. Another request is filling the cache: wait for it. If it finishes without filling the
+    # cache (e.g. its DB read failed), the lock is gone and we try to fill the cache ourselves.
+    logger.debug("--- CACHE FILL IN PROGRESS: Waiting for item %s (%s) ---", item_id, pattern)
+    for _ in range(int(LOCK_WAIT_SECONDS / LOCK_POLL_INTERVAL_SECONDS)):
+        await asyncio.sleep(LOCK_POLL_INTERVAL_SECONDS)
+        async with redis_conn.pipeline(transaction=False) as pipe:
+            pipe.hgetall(item_key(item_id))
+            pipe.exists(item_missing_key(item_id))
+            pipe.exists(item_lock_key(item_id))
+            cached_fields, missing, locked = await pipe.execute()
+        if cached_fields:
+            logger.debug("--- CACHE HIT: Item %s filled by another request (%s) ---", item_id, pattern)
+            return decode_item_hash(item_id, cached_fields)
+        if missing:
+            raise HTTPException(status_code=404, detail="Item not found")
+        if not locked:
+            cached_item = await _fill_with_lock(redis_conn, item_id, pattern)
+            if cached_item is not None:
+                return cached_item
+
+    # 4. Last resort: the other request didn't fill the cache in time, fetch it ourselves
+    return await _fill_from_db(redis_conn, item_id, pattern)
+
+async def read_through_get_item(redis_conn: redis.Redis, item_id: str, skip_cache_check: bool = False) -> bytes:
     """
     **Read-Through Caching (implemented as a helper function):**
     The cache acts as the primary data source. When data is requested, the cache is checked.
@@ -121,31 +891,17 @@ async def read_through_get_item(item_id: str) -> ItemInDB:
     populating itself, and then returning the data to the application.
     This pattern is often seen in distributed caching systems where the cache layer itself manages data retrieval from the origin.
     """
-    # 1. Check cache
-    cached_item = await redis_client.get(f"item:{item_id}")
-    if cached_item:
-        print(f"--- CACHE HIT: Item {item_id} found in cache (Read-Through) ---")
-        return ItemInDB.model_validate_json(cached_item)
-
-    print(f"--- CACHE MISS: Item {item_id} not in cache (Read-Through) ---")
-    # 2. Cache miss: Fetch from database
-    db_item = await get_item_from_db(item_id)
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Item not found")
-
-    # 3. Populate cache
-    await redis_client.setex(f"item:{item_id}", REDIS_TTL_SECONDS, ItemInDB(**db_item).model_dump_json())
-    print(f"--- CACHE POPULATED: Item {item_id} added to cache (Read-Through) ---")
-
-    return ItemInDB(**db_item)
+    return await _get_or_fill(redis_conn, item_id, "Read-Through", skip_cache_check)
 
 @app.get("/read-through/{item_id}", response_model=ItemInDB, summary="Read-Through Caching")
-async def get_item_read_through(item_id: str):
-    return await read_through_get_item(item_id)
+async def get_item_read_through(item_id: str, request: Request, redis_conn: redis.Redis = Depends(get_redis)):
+    # Return the cached JSON as-is; `response_model` is kept for the API docs only.
+    cached_item = await read_through_get_item(redis_conn, item_id, getattr(request.state, "cache_checked", False))
+    return Response(content=cached_item, media_type="application/json")
 
 
 @app.get("/cache-aside/{item_id}", response_model=ItemInDB, summary="Cache-Aside Caching")
-async def get_item_cache_aside(item_id: str):
+async def get_item_cache_aside(item_id: str, request: Request, redis_conn: redis.Redis = Depends(get_redis)):
     """
     **Cache-Aside:**
     The application directly manages the cache. When data is needed, the application first checks the cache.
@@ -153,52 +909,115 @@ async def get_item_cache_aside(item_id: str):
     populates the cache, and then returns the data.
     Usecases: General-purpose caching of read-heavy data (e.g., API responses, product catalogs).
     """
-    # 1. Check cache first
-    cached_item = await redis_client.get(f"item:{item_id}")
-    if cached_item:
-        print(f"--- CACHE HIT: Item {item_id} found in cache (Cache-Aside) ---")
-        return ItemInDB.model_validate_json(cached_item)
+    cached_item = await _get_or_fill(redis_conn, item_id, "Cache-Aside", getattr(request.state, "cache_checked", False))
+    return Response(content=cached_item, media_type="application/json")
 
-    print(f"--- CACHE MISS: Item {item_id} not in cache (Cache-Aside) ---")
-    # 2. If not in cache, fetch from database
-    db_item = await get_item_from_db(item_id)
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Item not found")
+@app.get("/cache-aside-batch", response_model=List[ItemInDB], summary="Batched Cache-Aside Caching")
+async def get_items_cache_aside_batch(ids: List[str] = Query(...), redis_conn: redis.Redis = Depends(get_redis)):
+    """
+    **Batched Cache-Aside:**
+    Same as Cache-Aside, but for several items at once. All cache lookups are sent in a single
+    pipeline, cache misses are fetched from the database concurrently, and the fetched items are
+    written back to the cache in a second pipeline. N round-trips to Redis become 2.
+    Items that are not found in the database are omitted from the response.
+    """
+    # 1. Check cache for all items in one round-trip
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        for item_id in ids:
+            pipe.hgetall(item_key(item_id))
+        cached_items = await pipe.execute()
+
+    results: Dict[str, bytes] = {}
+    missed_ids: List[str] = []
+    for item_id, cached_fields in zip(ids, cached_items):
+        if cached_fields:
+            results[item_id] = decode_item_hash(item_id, cached_fields)
+        else:
+            missed_ids.append(item_id)
+    logger.debug("--- CACHE BATCH: %s hit(s), %s miss(es) (Cache-Aside) ---", len(results), len(missed_ids))
+
+    if missed_ids:
+        # 2. Fetch all misses from the database concurrently
+        db_items = await asyncio.gather(*(get_item_from_db(item_id) for item_id in missed_ids))
+
+        # 3. Populate cache with the fetched data in one round-trip, without overwriting newer writes
+        found = [(item_id, db_item) for item_id, db_item in zip(missed_ids, db_items) if db_item]
+
+        async def fill_cache() -> List[Any]:
+            async with redis_conn.pipeline(transaction=False) as pipe:
+                for item_id, db_item in found:
+                    pipe.evalsha(get_or_set.sha, 1, item_key(item_id), *get_or_set_args(db_item))
+                return await pipe.execute()
+
+        try:
+            cached_fields_list = await fill_cache()
+        except NoScriptError:
+            # Redis lost its script cache (restart or SCRIPT FLUSH): load the script again and retry
+            await redis_conn.script_load(GET_OR_SET_SCRIPT)
+            cached_fields_list = await fill_cache()
+        for (item_id, db_item), cached_fields in zip(found, cached_fields_list):
+            if cached_fields:
+                results[item_id] = decode_item_hash(item_id, dict(zip(cached_fields[::2], cached_fields[1::2])))
+            else:
+                results[item_id] = orjson.dumps(db_item)
+        logger.debug("--- CACHE POPULATED: %s item(s) added to cache (Cache-Aside) ---", len(found))
+
+    # The results are JSON objects already, so join them into a JSON array directly
+    body = b"[" + b",".join(item for item in map(results.get, ids) if item is not None) + b"]"
+    return Response(content=body, media_type="application/json")
 
-    # 3. Populate cache with the fetched data
-    await redis_client.setex(f"item:{item_id}", REDIS_TTL_SECONDS, ItemInDB(**db_item).model_dump_json())
-    print(f"--- CACHE POPULATED: Item {item_id} added to cache (Cache-Aside) ---")
+@app.get("/cached-fields/{item_id}", summary="Read Selected Fields of a Cached Item")
+async def get_cached_item_fields(item_id: str, fields: List[str] = Query(...), redis_conn: redis.Redis = Depends(get_redis)):
+    """
+    Reads only the requested fields of a cached item with HMGET, without transferring the rest of it.
+    Only looks at the cache; returns 404 if the item is not cached.
+    """
+    unknown_fields = [field for field in fields if field not in ITEM_HASH_FIELDS]
+    if unknown_fields:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown_fields)}")
 
-    return ItemInDB(**db_item)
+    values = await redis_conn.hmget(item_key(item_id), fields)
+    if all(value is None for value in values):
+        raise HTTPException(status_code=404, detail="Item not found in cache")
+    return {field: decode_item_field(field, value) for field, value in zip(fields, values) if value is not None}
 
 @app.delete("/invalidate-cache/{item_id}", summary="Invalidate Cache for an Item")
-async def invalidate_cache(item_id: str):
+async def invalidate_cache(item_id: str, redis_conn: redis.Redis = Depends(get_redis)):
     """
     Invalidates an item from the cache. Useful after updates or deletions.
     """
-    deleted_count = await redis_client.delete(f"item:{item_id}")
+    deleted_count = await redis_conn.delete(item_key(item_id))
+    # Only after the Redis delete, so a read racing it can't put the old value back in the L1 cache
+    invalidate_l1(item_id)
     if deleted_count > 0:
-        print(f"--- CACHE INVALIDATED: Item {item_id} removed from cache ---")
+        logger.debug("--- CACHE INVALIDATED: Item %s removed from cache ---", item_id)
         return {"message": f"Cache for item {item_id} invalidated."}
     else:
-        print(f"--- CACHE INVALIDATION: Item {item_id} not found in cache ---")
+        logger.debug("--- CACHE INVALIDATION: Item %s not found in cache ---", item_id)
         return {"message": f"Item {item_id} was not in cache."}
 
 @app.delete("/delete-item/{item_id}", summary="Delete Item from DB and Invalidate Cache")
-async def delete_item(item_id: str):
+async def delete_item(item_id: str, redis_conn: redis.Redis = Depends(get_redis)):
     """
-    Deletes an item from the database and then invalidates it from the cache.
+    Deletes an item from the database and invalidates it from the cache.
     This is often used with Cache-Aside or Read-Through patterns to maintain consistency.
+    The DB delete and the cache invalidation are independent, so they run concurrently, and all
+    of the item's cache keys (the item, its fill lock and its index entries) are removed in a single round-trip.
     """
-    await delete_item_from_db(item_id)
-    await invalidate_cache(item_id)
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        uncache_item(pipe, item_id)
+        pipe.delete(item_lock_key(item_id))
+        await asyncio.gather(delete_item_from_db(item_id), pipe.execute())
+    # Only after both deletes, so a read racing them can't put the old value back in the L1 cache
+    invalidate_l1(item_id)
+    logger.debug("--- CACHE INVALIDATED: Item %s removed from cache ---", item_id)
     return {"message": f"Item {item_id} deleted from DB and cache invalidated."}
 
 @app.get("/health", summary="Health Check")
-async def health_check():
+async def health_check(redis_conn: redis.Redis = Depends(get_redis)):
     """Checks if the application and Redis are accessible."""
     try:
-        await redis_client.ping()
+        await redis_conn.ping()
         return {"status": "ok", "redis_connected": True}
     except Exception as e:
         return {"status": "error", "redis_connected": False, "detail": str(e)}
@@ -209,26 +1028,9 @@ async def get_item_from_simulated_db(item_id: str):
     item = await get_item_from_db(item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found in simulated DB")
-    return ItemInDB(**item)
+    return Response(content=orjson.dumps(item), media_type="application/json")
 
 @app.get("/simulated-db-all", summary="Get All Items from Simulated DB")
 async def get_all_items_from_simulated_db():
     """Allows direct inspection of all items in the simulated database."""
     return simulated_db
-
-@app.on_event("startup")
-async def startup_event():
-    """Connect to Redis on application startup."""
-    try:
-        await redis_client.ping()
-        print("Connected to Redis successfully!")
-    except redis.ConnectionError as e:
-        print(f"Could not connect to Redis: {e}. Please ensure Redis is running.")
-        # In a real app, you might want to exit or handle this more gracefully.
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close Redis connection on application shutdown."""
-    await redis_client.close()
-    print("Redis connection closed.")
-